@@ -0,0 +1,212 @@
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from scipy.integrate import solve_ivp
+
+from vehicle import Vehicle
+from physics import Atmosphere, Physics
+from thermo import Thermo
+
+
+@dataclass
+class BatchEOM:
+    """Vectorized equations of motion for N vehicles integrated together in one state vector.
+
+    The state is stacked as [v_0..v_N-1, gamma_0..gamma_N-1, h_0..h_N-1]. A vehicle that reached the ground
+    (h <= 0) is frozen, so the remaining ones can keep integrating in the same solve.
+    """
+    beta: np.ndarray             # ballistic coefficients (kg/m^2)
+    L_over_D: np.ndarray         # [-]
+    gamma_full_lift: np.ndarray  # (deg), see EOM
+    gamma_no_lift: np.ndarray    # (deg), see EOM
+    atmos: Atmosphere = field(default_factory=Atmosphere)
+
+    G: float = Physics.G
+    RE: float = Physics.RE
+    ME: float = Physics.ME
+
+    @classmethod
+    def from_rockets(cls, rockets: list[Vehicle], control_params=None, dtype=float) -> "BatchEOM":
+        """builds the batch from vehicles; control_params is one dict for all vehicles or one dict per vehicle.
+        dtype sets the precision of the parameter arrays and therefore of all derivatives"""
+        if control_params is None or isinstance(control_params, dict):
+            control_params = [control_params or {}] * len(rockets)
+
+        for c in control_params:
+            if not c.get("gamma_full_lift", -5.0) < c.get("gamma_no_lift", 0.0):
+                raise ValueError("control law requires gamma_full_lift < gamma_no_lift")
+
+        return cls(
+            beta=np.array([r.get_ballistic_coefficient() for r in rockets], dtype=dtype),
+            L_over_D=np.array([r.get_L_over_D() for r in rockets], dtype=dtype),
+            gamma_full_lift=np.array([c.get("gamma_full_lift", -5.0) for c in control_params], dtype=dtype),
+            gamma_no_lift=np.array([c.get("gamma_no_lift", 0.0) for c in control_params], dtype=dtype),
+        )
+
+    def _per_vehicle(self, values: np.ndarray, like: np.ndarray) -> np.ndarray:
+        """reshapes a per-vehicle (N,) array so it broadcasts against (N,) or (N, T) shaped states"""
+        return values.reshape(values.shape + (1,) * (np.ndim(like) - 1))
+
+    def control_gain(self, gamma: np.ndarray) -> np.ndarray:
+        """vectorized version of EOM.control_gain"""
+        gamma_deg = np.degrees(gamma)
+        no_lift = self._per_vehicle(self.gamma_no_lift, gamma)
+        width = self._per_vehicle(self.gamma_no_lift - self.gamma_full_lift, gamma)  # > 0, see from_rockets
+
+        return np.clip((no_lift - gamma_deg) / width, 0.0, 1.0)
+
+    def derivatives(self, v: np.ndarray, gamma: np.ndarray, h: np.ndarray):
+        """returns (v_dot, gamma_dot, h_dot) for arrays of states; works for (N,) and (N, T) shaped inputs"""
+        beta = self._per_vehicle(self.beta, v)
+        LoverD = self.control_gain(gamma) * self._per_vehicle(self.L_over_D, v)
+
+        h_pos = np.maximum(h, 0.0)
+        q = self.atmos.rho0 * np.exp(self.atmos.k * h_pos) * v ** 2 / 2
+        g = self.G * self.ME / (self.RE + h_pos) ** 2
+
+        v_dot = - q / beta + g * np.sin(gamma)
+        gamma_dot = 1 / v * (- q / beta * LoverD + np.cos(gamma) * (g - v ** 2 / (self.RE + h)))
+        h_dot = - v * np.sin(gamma)
+
+        return v_dot, gamma_dot, h_dot
+
+    def right_sides(self, t: float, state: np.ndarray) -> np.ndarray:
+        v, gamma, h = state.reshape(3, -1)
+        v_dot, gamma_dot, h_dot = self.derivatives(v, gamma, h)
+
+        active = h > 0.0  # landed vehicles are frozen
+        return np.concatenate([v_dot * active, gamma_dot * active, h_dot * active])
+
+
+@dataclass
+class BatchResult:
+    """Dense histories of a batched solve; samples after index n_valid[i] - 1 belong to the frozen state."""
+    t: np.ndarray        # (T,) shared time grid
+    v: np.ndarray        # (N, T)
+    gamma: np.ndarray    # (N, T)
+    h: np.ndarray        # (N, T)
+    n_valid: np.ndarray  # (N,) number of samples up to and including ground impact
+    eom: BatchEOM
+    nose_radius: np.ndarray
+
+
+def run_batch_simulation(rockets: list[Vehicle],
+                         control_params=None,
+                         t_max: float = 10000.0,
+                         max_step: float = 0.5,
+                         rtol: float = 1e-8,
+                         atol: float = 1e-9) -> BatchResult:
+    """Runs the entry simulation of several vehicles as one solve_ivp call with a stacked state vector"""
+    eom = BatchEOM.from_rockets(rockets, control_params)
+
+    y0 = np.concatenate([
+        [r.initial_velocity for r in rockets],
+        [math.radians(r.initial_angle) for r in rockets],
+        [r.initial_altitude for r in rockets],
+    ]).astype(float)
+
+    def event_all_landed(t: float, state: np.ndarray):
+        return np.max(state[2 * len(rockets):])  # becomes 0 when the last vehicle hits the ground
+
+    event_all_landed.terminal = True
+    event_all_landed.direction = -1
+
+    solution = solve_ivp(
+        fun=eom.right_sides,
+        t_span=(0, t_max),
+        y0=y0,
+        events=event_all_landed,
+        max_step=max_step,
+        rtol=rtol,
+        atol=atol
+    )
+
+    v, gamma, h = solution.y.reshape(3, len(rockets), -1)
+
+    landed = h <= 0.0
+    n_valid = np.where(landed.any(axis=1), np.argmax(landed, axis=1) + 1, h.shape[1])
+
+    return BatchResult(
+        t=solution.t, v=v, gamma=gamma, h=h, n_valid=n_valid, eom=eom,
+        nose_radius=np.array([r.nose_radius for r in rockets], dtype=float),
+    )
+
+
+def run_batch_fixed_step(rockets: list[Vehicle],
+                         control_params=None,
+                         dt: float = 0.1,
+                         t_max: float = 10000.0,
+                         dtype=np.float32) -> BatchResult:
+    """
+    Fixed-step RK4 version of run_batch_simulation whose state and histories are kept in dtype
+    (float32 by default) for screening runs. Each step is written straight into one preallocated history
+    block (one row of v, gamma, h per step) that grows in place when the run takes longer than its
+    capacity, so the histories are never held twice; v, gamma and h of the result are (N, T) views on it.
+    Each step is taken for all vehicles at once; vehicles stop moving once they reach the ground.
+    """
+    eom = BatchEOM.from_rockets(rockets, control_params, dtype=dtype)
+
+    y = np.concatenate([
+        [r.initial_velocity for r in rockets],
+        [math.radians(r.initial_angle) for r in rockets],
+        [r.initial_altitude for r in rockets],
+    ]).astype(dtype)
+    h = y[2 * len(rockets):]
+    step = dtype(dt)
+
+    max_samples = int(math.ceil(t_max / dt)) + 1
+    history = np.empty((min(max_samples, 4096), y.size), dtype=dtype)  # (T, 3N), grown by doubling
+    history[0] = y
+    n_steps = 0
+    while np.any(h > 0.0) and n_steps * dt < t_max:
+        k1 = eom.right_sides(0.0, y)
+        k2 = eom.right_sides(0.0, y + step / 2 * k1)
+        k3 = eom.right_sides(0.0, y + step / 2 * k2)
+        k4 = eom.right_sides(0.0, y + step * k3)
+        y += step / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        n_steps += 1
+
+        if n_steps == history.shape[0]:
+            history.resize((min(2 * n_steps, max_samples), y.size), refcheck=False)  # in place (realloc)
+        history[n_steps] = y
+
+    history.resize((n_steps + 1, y.size), refcheck=False)  # release the unused capacity
+    states = history.T.reshape(3, len(rockets), -1)  # (3, N, T) view
+    landed = states[2] <= 0.0
+    n_valid = np.where(landed.any(axis=1), np.argmax(landed, axis=1) + 1, states.shape[2])
+
+    return BatchResult(
+        t=(np.arange(states.shape[2]) * dt).astype(dtype), v=states[0], gamma=states[1], h=states[2],
+        n_valid=n_valid, eom=eom,
+        nose_radius=np.array([r.nose_radius for r in rockets], dtype=dtype),
+    )
+
+
+def compute_batch_metrics(result: BatchResult, k_sg: float = Thermo.k_sg, block_size: int = 1024):
+    """computes peak heat flux [MW/m²], integral heat load [MJ/m²] and maximum deceleration [m/s²] for every
+    vehicle of a batched solve (same definitions as running_utils.compute_metrics). The histories are reduced
+    in blocks of block_size samples, so the temporaries stay small next to the histories themselves."""
+    n_vehicles, n_samples = result.v.shape
+    q_max = np.zeros(n_vehicles, dtype=result.v.dtype)
+    q_integral = np.zeros(n_vehicles, dtype=result.v.dtype)
+    v_dot_max = np.zeros(n_vehicles, dtype=result.v.dtype)
+
+    # consecutive blocks share one sample, so every trapezoid interval lies inside one block
+    for start in range(0, max(n_samples - 1, 1), block_size):
+        cols = slice(start, min(start + block_size + 1, n_samples))
+        v, gamma, h = result.v[:, cols], result.gamma[:, cols], result.h[:, cols]
+        valid = np.arange(cols.start, cols.stop)[None, :] < result.n_valid[:, None]
+
+        rho = result.eom.atmos.rho0 * np.exp(result.eom.atmos.k * np.maximum(h, 0.0))
+        q = k_sg * np.sqrt(rho / result.nose_radius[:, None]) * v ** 3
+        q = np.where(valid, q, 0.0)
+        q_max = np.maximum(q_max, np.max(q, axis=1))
+
+        # trapezoid over the valid samples only; the interval after impact has both ends masked out
+        dt = np.diff(result.t[cols])
+        q_integral += np.sum(0.5 * (q[:, 1:] + q[:, :-1]) * dt * valid[:, 1:], axis=1)
+
+        v_dot, _, _ = result.eom.derivatives(v, gamma, h)
+        v_dot_max = np.maximum(v_dot_max, np.max(np.where(valid, np.abs(v_dot), 0.0), axis=1))
+
+    return q_max / 1e6, q_integral / 1e6, v_dot_max
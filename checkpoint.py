@@ -0,0 +1,98 @@
+import os
+import time
+import struct
+
+import numpy as np
+
+MAGIC = b"RRSWCKP1"                  # file header, identifies the record layout below
+RECORD = struct.Struct("<32s4d")     # config hash (sha256 digest), sweep value, q_max, q_int, n_max
+
+
+def read_checkpoint(file_path: str) -> dict[str, tuple[float, float, float, float]]:
+    """Reads all complete records of a checkpoint log: config hash (hex) -> (value, q_max, q_int, n_max).
+    Safe to call while a sweep is still appending; a partially written last record is ignored."""
+    if not os.path.exists(file_path):
+        return {}
+
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    if not data:
+        return {}  # created by a sweep that has not written its header yet
+
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{file_path} is not a sweep checkpoint")
+
+    body = data[len(MAGIC):]
+    n_records = len(body) // RECORD.size
+    records = {}
+    for key, *values in RECORD.iter_unpack(body[:n_records * RECORD.size]):
+        records[key.hex()] = tuple(values)
+
+    return records
+
+
+def read_checkpoint_arrays(file_path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """partial sweep results as (values, q_max, q_int, n_max) arrays sorted by sweep value, e.g. for plotting a
+    running sweep with plot_sweep"""
+    records = np.array(list(read_checkpoint(file_path).values()), dtype=float).reshape(-1, 4)
+    records = records[np.argsort(records[:, 0])]
+    return records[:, 0], records[:, 1], records[:, 2], records[:, 3]
+
+
+class SweepCheckpoint:
+    """Append-only binary log of finished sweep points.
+
+    Records are buffered and written, flushed and fsynced together every `every` points or `interval`
+    seconds, whichever comes first, so the overhead per point stays small and at most one batch is lost
+    if the process dies.
+    """
+
+    def __init__(self, file_path: str, every: int = 50, interval: float = 30.0):
+        self.file_path = file_path
+        self.every = every
+        self.interval = interval
+        self.completed = read_checkpoint(file_path)
+
+        is_new = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        self._file = open(file_path, "ab")
+        if is_new:
+            # header goes to disk right away so readers and a resumed sweep see a valid (empty) log
+            self._file.write(MAGIC)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        else:
+            # drop a torn record from a crash so new records stay aligned
+            size = os.path.getsize(file_path)
+            torn = (size - len(MAGIC)) % RECORD.size
+            if torn:
+                self._file.truncate(size - torn)
+
+        self._pending = []
+        self._last_sync = time.monotonic()
+
+    def __enter__(self) -> "SweepCheckpoint":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, key: str, value: float, q_max: float, q_int: float, n_max: float):
+        self._pending.append(RECORD.pack(bytes.fromhex(key), value, q_max, q_int, n_max))
+        self.completed[key] = (value, q_max, q_int, n_max)
+
+        if len(self._pending) >= self.every or time.monotonic() - self._last_sync >= self.interval:
+            self.sync()
+
+    def sync(self):
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._pending.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
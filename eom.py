@@ -12,17 +12,24 @@ class EOM:
     atmos: Atmosphere
     phys: Physics
 
-    @staticmethod
-    def control_gain(gamma: float) -> float:
+    gamma_full_lift: float = -5.0  # flight path angle (deg) at and below which the full L/D is used
+    gamma_no_lift: float = 0.0     # flight path angle (deg) at and above which no lift is used
+
+    def __post_init__(self):
+        if not self.gamma_full_lift < self.gamma_no_lift:
+            raise ValueError("control law requires gamma_full_lift < gamma_no_lift")
+
+    def control_gain(self, gamma: float) -> float:
         """control law to avoid skip trajectories based on flight path angle gamma (radians)"""
         gamma_deg = math.degrees(gamma)
 
-        if gamma_deg <= -5.0:
+        if gamma_deg <= self.gamma_full_lift:
             return 1.0
-        elif gamma_deg >= 0.0:
+        elif gamma_deg >= self.gamma_no_lift:
             return 0.0
         else:
-            return -gamma_deg / 5.0  # linear interpolation between 0 and 1
+            # linear interpolation between 0 and 1
+            return (self.gamma_no_lift - gamma_deg) / (self.gamma_no_lift - self.gamma_full_lift)
 
     def right_sides (self, t: float, state: np.ndarray) -> np.ndarray:
 
@@ -45,4 +52,4 @@ class EOM:
 
         h_dot = - v * math.sin(gamma)
 
-        return np.array([v_dot, gamma_dot, h_dot], dtype=float)
\ No newline at end of file
+        return np.array([v_dot, gamma_dot, h_dot], dtype=float)
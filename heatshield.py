@@ -0,0 +1,140 @@
+import numpy as np
+from dataclasses import dataclass
+
+from thermo import Thermo
+from simulate import compute_thermal_histories
+
+
+@dataclass
+class HeatShield:
+    """Material and discretization of a 1D heat shield slab (heated front face, adiabatic back face)"""
+    thickness: float = 0.05         # [m]
+    conductivity: float = 0.25      # [W/(m*K)]
+    density: float = 270.0          # [kg/m^3]
+    specific_heat: float = 1500.0   # [J/(kg*K)]
+    emissivity: float = 0.8         # [-]
+    n_nodes: int = 41               # [-] nodes through the thickness
+    T_initial: float = 273.15       # [K]
+    T_atmos: float = 273.15         # [K] background temperature for re-radiation, see Thermo
+
+
+class ConductionSolver:
+    """Implicit (backward Euler) transient conduction for M slabs at once with a fixed time step.
+
+    The tridiagonal system is the same in every step except the front-face row, which carries the
+    linearized re-radiation term. Eliminating bottom-up therefore lets the pivots of all other rows be
+    computed once in the constructor; a step is then one O(N) sweep in each direction, vectorized over M.
+    """
+
+    def __init__(self, shield: HeatShield, dt: float, n_members: int = 1, thickness=None):
+        self.shield = shield
+        self.dt = dt
+        thickness = np.broadcast_to(shield.thickness if thickness is None else thickness, (n_members,))
+
+        n = shield.n_nodes
+        dx = np.asarray(thickness, dtype=float) / (n - 1)                      # (M,)
+        diffusivity = shield.conductivity / (shield.density * shield.specific_heat)
+        r = diffusivity * dt / dx ** 2                                         # (M,)
+        self.r = r
+
+        # rows: a_i T_{i-1} + b_i T_i + c_i T_{i+1} = d_i, half control volumes at both faces
+        self.a = np.tile(-r, (n, 1))
+        self.c = np.tile(-r, (n, 1))
+        self.b = np.tile(1 + 2 * r, (n, 1))
+        self.c[0] = -2 * r
+        self.a[-1] = -2 * r
+        self.a[0] = 0.0
+        self.c[-1] = 0.0
+
+        # front face: heat input per unit temperature change of the half cell (K per J/m^2)
+        self.surface_factor = 2 * dt / (shield.density * shield.specific_heat * dx)
+
+        # bottom-up pivots for rows n-1 .. 1, independent of the step
+        self.pivot = np.empty((n, n_members))
+        self.pivot[-1] = self.b[-1]
+        for i in range(n - 2, 0, -1):
+            self.pivot[i] = self.b[i] - self.c[i] * self.a[i + 1] / self.pivot[i + 1]
+
+        self.T = np.full((n, n_members), shield.T_initial, dtype=float)
+        self._d = np.empty_like(self.T)
+
+    def step(self, q_conv: np.ndarray) -> np.ndarray:
+        """advances all slabs by dt with front-face convective heat flux q_conv (W/m^2), returns the
+        surface temperatures (K)"""
+        T = self.T
+        d = self._d
+        eps_sigma = self.shield.emissivity * Thermo.sigma
+
+        # linearized radiation: T^4 ~ 4 T_old^3 T - 3 T_old^4
+        T0 = T[0]
+        pivot0 = 1 + 2 * self.r + self.surface_factor * 4 * eps_sigma * T0 ** 3
+        d[0] = T0 + self.surface_factor * (q_conv + eps_sigma * (3 * T0 ** 4 + self.shield.T_atmos ** 4))
+
+        # bottom-up elimination of the right-hand side, then top-down substitution
+        d[-1] = T[-1]
+        for i in range(len(T) - 2, 0, -1):
+            d[i] = T[i] - self.c[i] * d[i + 1] / self.pivot[i + 1]
+        d[0] = d[0] - self.c[0] * d[1] / self.pivot[1]
+        pivot0 = pivot0 - self.c[0] * self.a[1] / self.pivot[1]
+
+        T[0] = d[0] / pivot0
+        for i in range(1, len(T)):
+            T[i] = (d[i] - self.a[i] * T[i - 1]) / self.pivot[i]
+
+        return T[0]
+
+
+@dataclass
+class ConductionResult:
+    t: np.ndarray          # (K,) uniform time grid [s]
+    T_surface: np.ndarray  # (M, K) front face temperature [K]
+    T_back: np.ndarray     # (M, K) back face temperature [K]
+
+
+def simulate_heat_shield(shield: HeatShield, histories: list[tuple[np.ndarray, np.ndarray]], dt: float = 0.1,
+                         thickness=None, soak_time: float = 0.0) -> ConductionResult:
+    """Runs the conduction model as a post-processing stage for several heat flux histories (t [s],
+    q [W/m^2]) at once, e.g. all trajectories of a sweep. The histories are resampled onto a common grid
+    with step dt; a trajectory that ended earlier sees no heat flux afterwards. thickness optionally
+    gives one slab thickness per history; soak_time (s) extends the run after the last trajectory ended so
+    the back face soak-back peak is captured."""
+    t_end = max(t[-1] for t, _ in histories) + soak_time
+    t_grid = np.arange(0.0, t_end + dt, dt)
+    q_grid = np.array([np.interp(t_grid, t, q, right=0.0) for t, q in histories])
+
+    solver = ConductionSolver(shield, dt, n_members=len(histories), thickness=thickness)
+
+    T_surface = np.empty_like(q_grid)
+    T_back = np.empty_like(q_grid)
+    T_surface[:, 0] = solver.T[0]
+    T_back[:, 0] = solver.T[-1]
+    for k in range(1, len(t_grid)):
+        T_surface[:, k] = solver.step(q_grid[:, k])
+        T_back[:, k] = solver.T[-1]
+
+    return ConductionResult(t=t_grid, T_surface=T_surface, T_back=T_back)
+
+
+def heat_shield_from_solution(sol, thermo, shield: HeatShield | None = None, dt: float = 0.1) -> ConductionResult:
+    """conduction through the heat shield driven by the Sutton–Graves heat flux of one trajectory"""
+    t, q, _ = compute_thermal_histories(sol, thermo)
+    return simulate_heat_shield(shield or HeatShield(emissivity=thermo.emissivity), [(t, q)], dt=dt)
+
+
+def size_heat_shield(shield: HeatShield, t: np.ndarray, q: np.ndarray, T_back_limit: float,
+                     thicknesses: np.ndarray, dt: float = 0.1, soak_time: float = 0.0) -> float:
+    """returns the smallest thickness (m) whose peak back face temperature stays below T_back_limit (K),
+    interpolated between the candidate thicknesses, which are all simulated in one vectorized run.
+    Returns nan if no candidate is thick enough."""
+    thicknesses = np.sort(np.asarray(thicknesses, dtype=float))
+    result = simulate_heat_shield(shield, [(t, q)] * len(thicknesses), dt=dt, thickness=thicknesses,
+                                  soak_time=soak_time)
+    T_back_max = result.T_back.max(axis=1)
+
+    if T_back_max[-1] > T_back_limit:
+        return float("nan")
+    if T_back_max[0] <= T_back_limit:
+        return float(thicknesses[0])
+
+    i = np.argmax(T_back_max <= T_back_limit)  # first thickness that satisfies the limit
+    return float(np.interp(T_back_limit, [T_back_max[i], T_back_max[i - 1]], [thicknesses[i], thicknesses[i - 1]]))
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+
+from running_utils import config_hash, run_config
+
+
+@dataclass
+class Job:
+    key: str
+    config: dict
+    attempts: int
+
+
+@dataclass
+class Progress:
+    pending: int
+    leased: int
+    done: int
+    failed: int
+    throughput: float  # finished jobs per second over the last window, summed over all workers
+    workers: dict      # worker id -> finished jobs
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.leased + self.done + self.failed
+
+
+class JobBroker(ABC):
+    """Interface between sweep / Monte Carlo producers and simulation workers.
+
+    Jobs are keyed by config_hash, so submitting the same configuration twice and writing the same result
+    twice are both no-ops. A worker leases jobs for a limited time; a lease that runs out (crashed or
+    stalled node) makes the job available again, and failed jobs are retried up to max_attempts.
+    Backends for a real message broker or database implement the same methods.
+    """
+
+    @abstractmethod
+    def submit(self, configs: list[dict]) -> list[str]:
+        """adds jobs, returns their keys"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, n_jobs: int, lease_seconds: float) -> list[Job]:
+        """hands out up to n_jobs jobs that are pending or whose lease expired"""
+
+    @abstractmethod
+    def complete(self, key: str, worker_id: str, metrics: tuple[float, float, float]):
+        """stores the result of a job and marks it as done (idempotent), also when the lease ran out and the
+        job was handed to another worker in the meantime"""
+
+    @abstractmethod
+    def fail(self, key: str, worker_id: str, error: str):
+        """returns a job to the queue or marks it as failed once max_attempts is reached; ignored unless
+        worker_id still holds the lease (a stalled worker cannot requeue a job another worker runs) and
+        for jobs that already have a result"""
+
+    @abstractmethod
+    def results(self, keys: list[str] | None = None) -> dict[str, tuple[float, float, float]]:
+        """key -> (q_max [MW/m²], q_int [MJ/m²], n_max [m/s²]) for all (or the given) finished jobs"""
+
+    @abstractmethod
+    def progress(self, window: float = 60.0) -> Progress:
+        """aggregated state of the queue"""
+
+
+class SQLiteBroker(JobBroker):
+    """Local broker in a SQLite file for tests and single-machine runs with several worker processes.
+    SQLite locking is not reliable on network file systems, so multi-node campaigns need another backend."""
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                key TEXT PRIMARY KEY,
+                config TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                q_max REAL, q_int REAL, n_max REAL,
+                worker TEXT,
+                finished REAL
+            );
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        """explicit write transaction; the connection runs in autocommit mode, so `with connection:` alone
+        would commit every statement separately. BEGIN IMMEDIATE also serializes concurrent writers."""
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def submit(self, configs: list[dict]) -> list[str]:
+        keys = [config_hash(config) for config in configs]
+        with self._transaction() as cursor:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO jobs (key, config) VALUES (?, ?)",
+                [(key, json.dumps(config)) for key, config in zip(keys, configs)],
+            )
+        return keys
+
+    def lease(self, worker_id: str, n_jobs: int, lease_seconds: float) -> list[Job]:
+        now = time.time()
+        with self._transaction() as cursor:  # one leasing worker at a time
+            # stale leases that already used up all attempts are not handed out again
+            cursor.execute(
+                "UPDATE jobs SET status = 'failed', lease_owner = NULL, error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            # jobs with a stored result are finished, whoever wrote it
+            rows = cursor.execute(
+                "SELECT key, config, attempts FROM jobs "
+                "WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "AND key NOT IN (SELECT key FROM results) LIMIT ?",
+                (now, n_jobs),
+            ).fetchall()
+
+            cursor.executemany(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE key = ?",
+                [(worker_id, now + lease_seconds, key) for key, _, _ in rows],
+            )
+
+        return [Job(key=key, config=json.loads(config), attempts=attempts + 1) for key, config, attempts in rows]
+
+    def complete(self, key: str, worker_id: str, metrics: tuple[float, float, float]):
+        with self._transaction() as cursor:
+            cursor.execute(
+                "INSERT OR IGNORE INTO results (key, q_max, q_int, n_max, worker, finished) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *map(float, metrics), worker_id, time.time()),
+            )
+            # a stored result finishes the job, even if the lease already passed to another worker
+            cursor.execute("UPDATE jobs SET status = 'done', lease_owner = NULL, error = NULL WHERE key = ?", (key,))
+
+    def fail(self, key: str, worker_id: str, error: str):
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, error = ? WHERE key = ? AND status = 'leased' AND lease_owner = ? "
+                "AND key NOT IN (SELECT key FROM results)",
+                (self.max_attempts, error, key, worker_id),
+            )
+
+    def results(self, keys: list[str] | None = None) -> dict[str, tuple[float, float, float]]:
+        rows = self.connection.execute("SELECT key, q_max, q_int, n_max FROM results").fetchall()
+        found = {key: (q_max, q_int, n_max) for key, q_max, q_int, n_max in rows}
+        if keys is None:
+            return found
+        return {key: found[key] for key in keys if key in found}
+
+    def progress(self, window: float = 60.0) -> Progress:
+        counts = dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        workers = dict(self.connection.execute("SELECT worker, COUNT(*) FROM results GROUP BY worker").fetchall())
+        recent = self.connection.execute(
+            "SELECT COUNT(*) FROM results WHERE finished >= ?", (time.time() - window,)
+        ).fetchone()[0]
+
+        return Progress(
+            pending=counts.get("pending", 0),
+            leased=counts.get("leased", 0),
+            done=counts.get("done", 0),
+            failed=counts.get("failed", 0),
+            throughput=recent / window,
+            workers=workers,
+        )
+
+
+def submit_sweep(broker: JobBroker, parameter: str, sweep_array: np.ndarray, base_input_file: str) -> list[str]:
+    """submits one job per sweep value (see running_utils.sweep_parameter), returns the keys in sweep order"""
+    with open(base_input_file, "r", encoding="utf-8") as f:
+        base_config = json.load(f)
+
+    configs = []
+    for value in sweep_array:
+        config = dict(base_config)
+        config[parameter] = float(value)
+        configs.append(config)
+
+    return broker.submit(configs)
+
+
+def gather_metrics(broker: JobBroker, keys: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """q_max, q_int and n_max arrays in the order of keys; unfinished jobs are nan"""
+    found = broker.results(keys)
+    metrics = np.array([found.get(key, (np.nan,) * 3) for key in keys], dtype=float).reshape(-1, 3)
+    return metrics[:, 0], metrics[:, 1], metrics[:, 2]
+
+
+def run_job(config: dict) -> tuple[float, float, float]:
+    """simulates one job configuration and returns its metrics"""
+    return run_config(config)
+
+
+def run_worker(broker: JobBroker,
+               worker_id: str | None = None,
+               batch_size: int = 16,
+               lease_seconds: float = 600.0,
+               idle_exit: bool = True,
+               poll_interval: float = 5.0) -> int:
+    """Leases and runs jobs until the queue is empty (idle_exit) or forever. Start one worker per core on
+    every node that can reach the broker; throughput grows with the number of workers since they only
+    meet at the broker. Returns the number of jobs this worker finished."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    finished = 0
+
+    while True:
+        jobs = broker.lease(worker_id, batch_size, lease_seconds)
+        if not jobs:
+            progress = broker.progress()
+            if idle_exit and progress.leased == 0:
+                return finished
+            time.sleep(poll_interval)
+            continue
+
+        for job in jobs:
+            try:
+                metrics = run_job(job.config)
+            except Exception as error:
+                broker.fail(job.key, worker_id, repr(error))
+            else:
+                broker.complete(job.key, worker_id, metrics)
+                finished += 1
@@ -1,6 +1,6 @@
 import numpy as np
 
-from running_utils import compute_v_dot, sweep_parameter
+from running_utils import compute_v_dot, sweep_parameter, adaptive_sweep_parameter
 from simulate import run_simulation, compute_thermal_histories
 from plotting_utils import (
     plot_trajectory,
@@ -13,7 +13,7 @@ from plotting_utils import (
     plot_v_comparison,
     plot_vdot_comparison,
 )
-from trajectory import plot_movement
+from trajectory import plot_movement, animate_movement
 
 
 # ============================================================
@@ -37,10 +37,12 @@ PLOT_ACCELERATION_OVER_TIME = False
 
 PLOT_COMPARISONS = False         # comparison plots (ballistic vs lifting etc.)
 PLOT_MOVEMENT_ANIMATION = False  # trajectory over earth
+EXPORT_MOVEMENT_ANIMATION = False  # animation of all vehicles over earth to plots/ (needs ffmpeg)
 PLOT_COMBINED_FIGURE = True      # all-in-one figure like the script
 
 # Parameter sweep (either beta or gamma)
 RUN_SWEEP = False
+ADAPTIVE_SWEEP = False  # refine only where the metrics bend or the outcome changes instead of a uniform grid
 
 
 # ============================================================
@@ -137,6 +139,13 @@ if PLOT_ACCELERATION_OVER_TIME:
 if PLOT_MOVEMENT_ANIMATION:
     plot_movement(sol)
 
+if EXPORT_MOVEMENT_ANIMATION:
+    animate_movement(
+        [run_simulation(file)[0] for file in possible_files],
+        labels=["lifting body", "ballistic capsule"],
+        file_path="plots/reentry_comparison.mp4",
+    )
+
 if PLOT_COMBINED_FIGURE:
     plot_combined(t, v, h, (q / 1e6), T_wall, 'ballisticCapsule' if 'ballisticCapsule' in INPUT_FILE else 'liftingBody')
 
@@ -153,7 +162,18 @@ if PLOT_COMPARISONS:
 # 7) Parameter sweep
 # ============================================================
 
-if RUN_SWEEP:
+if RUN_SWEEP and ADAPTIVE_SWEEP:
+    # same range as the uniform sweep below, returns the non-uniform grid it ended up with
+    parameter, gamma_values, q_max, q_int, n_max = adaptive_sweep_parameter(
+        parameter="initial_angle",
+        start=0.1,
+        stop=21,
+        base_input_file=INPUT_FILE,
+    )
+
+    plot_sweep(parameter, gamma_values, q_max, q_int, n_max, True, 10)
+
+elif RUN_SWEEP:
     # Example sweep arrays (uncomment / adjust as needed)
     gamma_values = np.arange(0.1, 21, 0.1)  # degrees
     # beta_values = np.arange(5, 1001, 5)   # kg/m²
@@ -162,7 +182,7 @@ if RUN_SWEEP:
     parameter, q_max, q_int, n_max = sweep_parameter(
         parameter="initial_angle",
         sweep_array=gamma_values,
-        base_input_file="INPUT_FILE",
+        base_input_file=INPUT_FILE,
     )
 
-    plot_sweep(parameter, gamma_values, q_max, q_int, n_max, True, 10)
\ No newline at end of file
+    plot_sweep(parameter, gamma_values, q_max, q_int, n_max, True, 10)
@@ -0,0 +1,218 @@
+import json
+import numpy as np
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+from vehicle import Vehicle
+from simulate import run_simulation_from_rocket
+from running_utils import compute_metrics
+from batch import run_batch_simulation, compute_batch_metrics
+
+# design variables that can be optimized, split by where they end up
+VEHICLE_PARAMETERS = ("initial_angle", "L_over_D")
+CONTROL_PARAMETERS = ("gamma_full_lift", "gamma_no_lift")
+
+
+def split_design(names: tuple[str, ...], x: np.ndarray, base_config: dict) -> tuple[dict, dict]:
+    """maps a design vector onto a vehicle config and a control_params dict"""
+    config = dict(base_config)
+    control_params = {}
+    for name, value in zip(names, x):
+        if name in VEHICLE_PARAMETERS:
+            config[name] = float(value)
+        else:
+            control_params[name] = float(value)
+    return config, control_params
+
+
+def evaluate_design(names: tuple[str, ...], x: np.ndarray, base_config: dict) -> tuple[float, float, float]:
+    """runs one trajectory and returns (q_max [MW/m²], q_int [MJ/m²], n_max [m/s²]); top level so it can be
+    sent to worker processes"""
+    config, control_params = split_design(names, x, base_config)
+    rocket = Vehicle(**config)
+    sol, thermo, rocket = run_simulation_from_rocket(rocket, control_params=control_params)
+    return compute_metrics(sol, thermo, rocket, control_params)
+
+
+@dataclass
+class OptimizationResult:
+    """Best design found and convergence bookkeeping"""
+    x: dict                      # best design, parameter name -> value
+    q_max: float                 # [MW/m²]
+    q_int: float                 # [MJ/m²]
+    n_max: float                 # [m/s²]
+    objective: float
+    feasible: bool
+    n_evaluations: int           # trajectories actually simulated (cache hits excluded)
+    n_generations: int
+    converged: bool
+    history: list[float] = field(default_factory=list)  # best objective per generation
+
+
+@dataclass
+class TrajectoryOptimizer:
+    """Minimizes the integral heat load over entry conditions and control-law parameters subject to
+    limits on peak heat flux and maximum deceleration.
+
+    Constraints are handled by a relative penalty, the search is a differential evolution whose population
+    is simulated in parallel, and an optional finite-difference gradient polish refines the best design.
+    """
+    base_config: dict
+    bounds: dict                      # parameter name -> (lower, upper)
+    n_max_limit: float = 10 * 9.81    # [m/s²]
+    q_max_limit: float | None = None  # [MW/m²], None = unconstrained
+    penalty: float = 1e3
+    n_workers: int = 1
+    cache_decimals: int = 10          # design vectors are rounded to this many decimals for the cache key
+
+    cache: dict = field(default_factory=dict, init=False)
+    n_evaluations: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        for name in self.bounds:
+            if name not in VEHICLE_PARAMETERS + CONTROL_PARAMETERS:
+                raise ValueError(f"cannot optimize '{name}', choose from {VEHICLE_PARAMETERS + CONTROL_PARAMETERS}")
+        self.names = tuple(self.bounds)
+        self.lower = np.array([self.bounds[n][0] for n in self.names], dtype=float)
+        self.upper = np.array([self.bounds[n][1] for n in self.names], dtype=float)
+
+        # every design must be a valid EOM control law (gamma_full_lift < gamma_no_lift)
+        full_lift_max = self.bounds.get("gamma_full_lift", (-5.0, -5.0))[1]
+        no_lift_min = self.bounds.get("gamma_no_lift", (0.0, 0.0))[0]
+        if not full_lift_max < no_lift_min:
+            raise ValueError("bounds must keep gamma_full_lift below gamma_no_lift, "
+                             f"got upper gamma_full_lift {full_lift_max} >= lower gamma_no_lift {no_lift_min}")
+
+    @classmethod
+    def from_input_file(cls, input_file: str, bounds: dict, **kwargs) -> "TrajectoryOptimizer":
+        with open(input_file, "r", encoding="utf-8") as f:
+            base_config = json.load(f)
+        return cls(base_config=base_config, bounds=bounds, **kwargs)
+
+    def _key(self, x: np.ndarray) -> tuple:
+        return tuple(np.round(x, self.cache_decimals))
+
+    def objective_from_metrics(self, q_max: float, q_int: float, n_max: float) -> float:
+        """integral heat load plus relative penalties for exceeded limits"""
+        violation = max(0.0, n_max / self.n_max_limit - 1.0)
+        if self.q_max_limit is not None:
+            violation += max(0.0, q_max / self.q_max_limit - 1.0)
+        return q_int * (1.0 + self.penalty * violation)
+
+    def is_feasible(self, q_max: float, n_max: float) -> bool:
+        return n_max <= self.n_max_limit and (self.q_max_limit is None or q_max <= self.q_max_limit)
+
+    def evaluate(self, population: np.ndarray) -> list[tuple[float, float, float]]:
+        """returns the metrics of every design; only designs missing from the cache are simulated, in
+        parallel when n_workers > 1"""
+        population = np.atleast_2d(population)
+        missing = {}
+        for x in population:
+            key = self._key(x)
+            if key not in self.cache and key not in missing:
+                missing[key] = x
+
+        if missing:
+            xs = list(missing.values())
+            if self.n_workers > 1 and len(xs) > 1:
+                with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                    metrics = list(pool.map(evaluate_design, [self.names] * len(xs), xs,
+                                            [self.base_config] * len(xs)))
+            else:
+                metrics = [evaluate_design(self.names, x, self.base_config) for x in xs]
+
+            self.n_evaluations += len(xs)
+            self.cache.update(zip(missing.keys(), metrics))
+
+        return [self.cache[self._key(x)] for x in population]
+
+    def objective(self, x: np.ndarray) -> float:
+        return self.objective_from_metrics(*self.evaluate(x)[0])
+
+    def gradient(self, x: np.ndarray, rel_step: float = 1e-4) -> np.ndarray:
+        """one-sided difference gradient of the objective; the base point and all perturbed designs are
+        integrated together as one batched solve. Components at (or within one step of) their upper bound are
+        differenced backwards, so no perturbed design leaves the bounds box."""
+        steps = rel_step * np.maximum(np.abs(x), self.upper - self.lower)
+        steps = np.where(x + steps > self.upper, -steps, steps)
+        designs = [x] + [x + steps[i] * np.eye(len(x))[i] for i in range(len(x))]
+
+        rockets, control_params = [], []
+        for design in designs:
+            config, control = split_design(self.names, design, self.base_config)
+            rockets.append(Vehicle(**config))
+            control_params.append(control)
+
+        q_max, q_int, n_max = compute_batch_metrics(run_batch_simulation(rockets, control_params))
+        self.n_evaluations += len(designs)
+
+        f = np.array([self.objective_from_metrics(*m) for m in zip(q_max, q_int, n_max)])
+        return (f[1:] - f[0]) / steps
+
+    def optimize(self,
+                 population_size: int = 16,
+                 max_generations: int = 50,
+                 tol: float = 1e-4,
+                 mutation: float = 0.7,
+                 crossover: float = 0.9,
+                 polish_steps: int = 0,
+                 seed: int | None = None) -> OptimizationResult:
+        """Differential evolution (rand/1/bin). Converged when the relative spread of the population's
+        objective values drops below tol. polish_steps > 0 adds projected gradient steps afterwards."""
+        rng = np.random.default_rng(seed)
+        dim = len(self.names)
+
+        population = self.lower + rng.random((population_size, dim)) * (self.upper - self.lower)
+        fitness = np.array([self.objective_from_metrics(*m) for m in self.evaluate(population)])
+
+        history = [float(fitness.min())]
+        converged = False
+        generation = 0
+
+        for generation in range(1, max_generations + 1):
+            trials = np.empty_like(population)
+            for i in range(population_size):
+                a, b, c = rng.choice([j for j in range(population_size) if j != i], 3, replace=False)
+                mutant = population[a] + mutation * (population[b] - population[c])
+                cross = rng.random(dim) < crossover
+                cross[rng.integers(dim)] = True
+                trials[i] = np.clip(np.where(cross, mutant, population[i]), self.lower, self.upper)
+
+            trial_fitness = np.array([self.objective_from_metrics(*m) for m in self.evaluate(trials)])
+            improved = trial_fitness <= fitness
+            population[improved] = trials[improved]
+            fitness[improved] = trial_fitness[improved]
+
+            history.append(float(fitness.min()))
+            if np.std(fitness) <= tol * abs(np.mean(fitness)):
+                converged = True
+                break
+
+        x_best = population[np.argmin(fitness)]
+
+        step_size = 0.05 * (self.upper - self.lower)
+        for _ in range(polish_steps):
+            grad = self.gradient(x_best) * (self.upper - self.lower)  # gradient in box-normalized coordinates
+            norm = np.linalg.norm(grad)
+            if norm == 0.0:
+                break
+            candidate = np.clip(x_best - step_size * grad / norm, self.lower, self.upper)
+            if self.objective(candidate) < self.objective(x_best):
+                x_best = candidate
+            else:
+                step_size = step_size / 2
+
+        q_max, q_int, n_max = self.evaluate(x_best)[0]
+
+        return OptimizationResult(
+            x=dict(zip(self.names, map(float, x_best))),
+            q_max=float(q_max),
+            q_int=float(q_int),
+            n_max=float(n_max),
+            objective=float(self.objective_from_metrics(q_max, q_int, n_max)),
+            feasible=self.is_feasible(q_max, n_max),
+            n_evaluations=self.n_evaluations,
+            n_generations=generation,
+            converged=converged,
+            history=history,
+        )
@@ -0,0 +1,127 @@
+import json
+import numpy as np
+from dataclasses import dataclass, fields
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from vehicle import Vehicle
+from simulate import run_simulation_from_rocket, compute_thermal_histories
+from running_utils import compute_metrics
+
+VEHICLE_FIELDS = tuple(f.name for f in fields(Vehicle))  # column order of the shared input table
+METRIC_COLUMNS = 3                                        # q_max [MW/m²], q_int [MJ/m²], n_max [m/s²]
+HISTORY_COLUMNS = ("t", "v", "gamma", "h", "q")           # per-point histories, see SweepBuffers
+
+
+@dataclass
+class SharedBlock:
+    """Description of one numpy array living in shared memory; small enough to send to every worker"""
+    name: str
+    shape: tuple
+    dtype: str = "float64"
+
+    @classmethod
+    def create(cls, shape: tuple, dtype: str = "float64") -> tuple["SharedBlock", SharedMemory]:
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = SharedMemory(create=True, size=size)
+        return cls(name=shm.name, shape=tuple(shape), dtype=dtype), shm
+
+    def attach(self) -> tuple[np.ndarray, SharedMemory]:
+        """maps the block in a worker; the creating process stays responsible for unlinking it"""
+        shm = SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf), shm
+
+
+@dataclass
+class SweepBuffers:
+    """Shared blocks of one sweep: inputs (n, len(VEHICLE_FIELDS)), metrics (n, 3) and optionally
+    histories (n, len(HISTORY_COLUMNS), n_history) resampled on a uniform time grid per trajectory"""
+    inputs: SharedBlock
+    metrics: SharedBlock
+    histories: SharedBlock | None = None
+
+
+_worker = {}  # per-process views on the shared blocks, set up once by _init_worker
+
+
+def _init_worker(buffers: SweepBuffers):
+    _worker["handles"] = []
+    for key in ("inputs", "metrics", "histories"):
+        block = getattr(buffers, key)
+        if block is None:
+            _worker[key] = None
+            continue
+        array, shm = block.attach()
+        _worker[key] = array
+        _worker["handles"].append(shm)  # keep the mapping alive
+
+
+def _run_chunk(bounds: tuple[int, int]):
+    """simulates rows start..stop-1 of the input table and writes the results in place by index"""
+    inputs, metrics, histories = _worker["inputs"], _worker["metrics"], _worker["histories"]
+
+    for i in range(*bounds):
+        rocket = Vehicle(**dict(zip(VEHICLE_FIELDS, map(float, inputs[i]))))
+        sol, thermo, rocket = run_simulation_from_rocket(rocket)
+        metrics[i] = compute_metrics(sol, thermo, rocket)
+
+        if histories is not None:
+            t, q, _ = compute_thermal_histories(sol, thermo)
+            t_grid = np.linspace(t[0], t[-1], histories.shape[2])
+            histories[i, 0] = t_grid
+            for j, column in enumerate((sol.y[0], sol.y[1], sol.y[2], q), start=1):
+                histories[i, j] = np.interp(t_grid, t, column)
+
+
+def parallel_sweep_parameter(parameter: str, sweep_array: np.ndarray, base_input_file: str,
+                             n_workers: int = 4, chunk_size: int = 8, n_history: int = 0):
+    """
+    Multiprocess version of running_utils.sweep_parameter with the same return values. The sweep inputs
+    and all result arrays live in shared memory; workers only receive (start, stop) index pairs and write
+    their results in place, so nothing is pickled per point and memory does not grow with n_workers.
+
+    With n_history > 0 the histories of t, v, gamma, h and q (see HISTORY_COLUMNS) are kept on n_history
+    uniform samples per trajectory and returned as an additional (n, 5, n_history) array.
+    """
+    with open(base_input_file, "r", encoding="utf-8") as f:
+        base_config = json.load(f)
+
+    if parameter not in ("initial_angle", "ballistic_coefficient"):
+        raise ValueError("parameter must be 'initial_angle' or 'ballistic_coefficient'")
+
+    n = len(sweep_array)
+    shape = {
+        "inputs": (n, len(VEHICLE_FIELDS)),
+        "metrics": (n, METRIC_COLUMNS),
+        "histories": (n, len(HISTORY_COLUMNS), n_history) if n_history > 0 else None,
+    }
+
+    blocks, segments = {}, []
+    try:
+        for key, block_shape in shape.items():
+            if block_shape is not None:
+                blocks[key], shm = SharedBlock.create(block_shape)
+                segments.append(shm)
+
+        inputs = np.ndarray(shape["inputs"], buffer=segments[0].buf)
+        inputs[:] = [base_config[name] for name in VEHICLE_FIELDS]
+        inputs[:, VEHICLE_FIELDS.index(parameter)] = sweep_array
+        del inputs  # views must be gone before the segments are closed
+
+        buffers = SweepBuffers(**blocks)
+        chunks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+        with Pool(processes=n_workers, initializer=_init_worker, initargs=(buffers,)) as pool:
+            for _ in pool.imap_unordered(_run_chunk, chunks):
+                pass
+
+        metrics = np.ndarray(shape["metrics"], buffer=segments[1].buf).copy()
+        results = (parameter, metrics[:, 0], metrics[:, 1], metrics[:, 2])
+        if n_history > 0:
+            results = results + (np.ndarray(shape["histories"], buffer=segments[2].buf).copy(),)
+    finally:
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+    return results
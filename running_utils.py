@@ -1,11 +1,15 @@
 import numpy as np
 from numpy import ndarray
 import json
+import hashlib
+import warnings
 
 from vehicle import Vehicle
 from simulate import run_simulation, compute_thermal_histories, run_simulation_from_rocket
 from physics import Atmosphere, Physics
 from eom import EOM
+from checkpoint import SweepCheckpoint
+from batch import run_batch_fixed_step, compute_batch_metrics
 
 
 def run_model_and_heat_load(input_file: str):
@@ -55,7 +59,104 @@ def compute_v_dot(rocket, sol) -> tuple[ndarray, float]:
     return v_dot, v_dot_max
 
 
-def sweep_parameter(parameter: str, sweep_array: ndarray, base_input_file: str):
+def compute_metrics(sol, thermo, rocket, control_params: dict | None = None) -> tuple[float, float, float]:
+    """computes peak heat flux [MW/m²], integral heat load [MJ/m²] and maximum deceleration [m/s²] of one
+    trajectory. control_params must match the ones used for the simulation."""
+    t = sol.t
+    v = sol.y[0]
+    gamma = sol.y[1]
+    h = sol.y[2]
+
+    _, q, T_wall = compute_thermal_histories(sol, thermo)
+
+    q_max = np.max(q) / 1e6                # [MW/m²]
+    q_integral = np.trapezoid(q, t) / 1e6  # [MJ/m²]
+
+    phys = thermo.phys
+    atmos = thermo.atmos
+    eom = EOM(rocket=rocket, atmos=atmos, phys=phys, **(control_params or {}))
+
+    v_dot = np.empty_like(v)
+    for i, (ti, vi, gi, hi) in enumerate(zip(t, v, gamma, h)):
+        rhs = eom.right_sides(ti, np.array([vi, gi, hi]))
+        v_dot[i] = rhs[0]
+
+    v_dot_max = np.max(np.abs(v_dot))
+
+    return q_max, q_integral, v_dot_max
+
+
+def config_hash(config: dict) -> str:
+    """stable key of a simulation configuration (vehicle fields plus optional 'control_params')"""
+    payload = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def run_config(config: dict) -> tuple[float, float, float]:
+    """simulates one configuration (vehicle fields plus optional 'control_params') in float64 and returns
+    q_max [MW/m²], q_int [MJ/m²] and n_max [m/s²]"""
+    config = dict(config)
+    control_params = config.pop("control_params", None)
+    rocket = Vehicle(**config)
+    sol, thermo, rocket = run_simulation_from_rocket(rocket, control_params=control_params)
+    return compute_metrics(sol, thermo, rocket, control_params)
+
+
+def run_configs_reduced_precision(configs: list[dict], dt: float = 0.1, chunk_size: int = 256,
+                                  monitor_samples: int = 16, error_threshold: float = 1e-3) -> tuple[ndarray, dict]:
+    """
+    Screening mode for many configurations: trajectories are integrated in chunks with the float32
+    fixed-step batch integrator (state and histories in float32) and the metrics are returned as an
+    (n, 3) float32 array of q_max, q_int, n_max.
+
+    Error monitor: monitor_samples evenly spaced configurations are also run with run_config, the regular
+    float64 solver used by the other sweeps. The largest relative metric error of a sample underestimates
+    the largest one over all configurations (by up to 2-3x in sweeps), so once it exceeds
+    error_threshold / 2 all configurations are recomputed with run_config (reusing the reference runs) and
+    a float64 array is returned instead, with a warning. The error is dominated by where the peaks fall
+    between the time samples of either solver (up to about 1.2e-3 for steep entries at the reference's
+    max_step of 0.5 s), which a smaller dt does not reduce; steep sweeps therefore fall back at the default
+    error_threshold. The report dict holds 'precision', 'max_rel_error' (of the sample), 'n_reference' and
+    'fell_back'.
+    """
+    n = len(configs)
+    metrics = np.empty((n, 3), dtype=np.float32)
+
+    for start in range(0, n, chunk_size):
+        chunk = [dict(config) for config in configs[start:start + chunk_size]]
+        control_params = [config.pop("control_params", None) or {} for config in chunk]
+        result = run_batch_fixed_step([Vehicle(**config) for config in chunk], control_params, dt=dt)
+        metrics[start:start + len(chunk)] = np.column_stack(compute_batch_metrics(result))
+
+    sample = np.unique(np.linspace(0, n - 1, min(monitor_samples, n)).round().astype(int))
+    reference = {int(i): run_config(configs[i]) for i in sample}
+
+    max_rel_error = 0.0
+    for i, ref in reference.items():
+        ref = np.asarray(ref)
+        max_rel_error = max(max_rel_error, float(np.max(np.abs(metrics[i] - ref) / np.abs(ref))))
+
+    report = {
+        "precision": "float32",
+        "max_rel_error": max_rel_error,
+        "n_reference": len(reference),
+        "fell_back": False,
+    }
+
+    if max_rel_error > error_threshold / 2:
+        warnings.warn(f"float32 metrics deviate by {max_rel_error:.1e} from the float64 solver (threshold "
+                      f"{error_threshold:.1e}), recomputing all {n} configurations in float64")
+        metrics = np.array([reference[i] if i in reference else run_config(configs[i]) for i in range(n)],
+                           dtype=float).reshape(n, 3)
+        report.update(precision="float64", fell_back=True)
+
+    return metrics, report
+
+
+def sweep_parameter(parameter: str, sweep_array: ndarray, base_input_file: str,
+                    checkpoint_file: str | None = None, checkpoint_every: int = 50,
+                    checkpoint_interval: float = 30.0, precision: str = "float64", return_report: bool = False,
+                    dt: float = 0.1, monitor_samples: int = 16, error_threshold: float = 1e-3):
     """
     Sweep either 'initial_angle' (deg) or 'ballistic_coefficient' (kg/m²)
     and compute:
@@ -63,6 +164,15 @@ def sweep_parameter(parameter: str, sweep_array: ndarray, base_input_file: str):
       - q_int:   integral heat load [MJ/m²]
       - n_max:   maximum deceleration [g]
     for each value in sweep_array.
+
+    With a checkpoint_file every finished point is appended to that log (synced to disk every
+    checkpoint_every points or checkpoint_interval seconds) and points already in the log are not
+    simulated again, so an interrupted sweep resumes by calling it again with the same arguments.
+
+    precision="float32" runs the sweep in the reduced-precision screening mode with error monitoring
+    (see run_configs_reduced_precision for dt, monitor_samples and error_threshold, which only apply to
+    this mode); it cannot be combined with a checkpoint_file. With return_report=True the precision report (None for float64) is returned as a
+    fifth element.
     """
 
     with open(base_input_file, "r", encoding="utf-8") as f:
@@ -71,46 +181,161 @@ def sweep_parameter(parameter: str, sweep_array: ndarray, base_input_file: str):
     if parameter not in ("initial_angle", "ballistic_coefficient"):
         raise ValueError("parameter must be 'initial_angle' or 'ballistic_coefficient'")
 
-    q_max_list = []
-    q_int_list = []
-    n_max_list = []
+    if precision == "float32":
+        if checkpoint_file is not None:
+            raise ValueError("checkpointing is only supported for float64 sweeps")
 
-    for value in sweep_array:
-        config = dict(base_config)
-        config[parameter] = value
+        configs = [dict(base_config, **{parameter: float(value)}) for value in sweep_array]
+        metrics, report = run_configs_reduced_precision(configs, dt=dt, monitor_samples=monitor_samples,
+                                                        error_threshold=error_threshold)
+        result = (parameter, metrics[:, 0], metrics[:, 1], metrics[:, 2])
+        return result + (report,) if return_report else result
 
-        rocket = Vehicle(**config)
+    if precision != "float64":
+        raise ValueError("precision must be 'float64' or 'float32'")
 
-        sol, thermo, rocket = run_simulation_from_rocket(rocket)
+    q_max_list = []
+    q_int_list = []
+    n_max_list = []
 
-        t = sol.t
-        v = sol.y[0]
-        gamma = sol.y[1]
-        h = sol.y[2]
+    checkpoint = None
+    if checkpoint_file is not None:
+        checkpoint = SweepCheckpoint(checkpoint_file, every=checkpoint_every, interval=checkpoint_interval)
 
-        _, q, T_wall = compute_thermal_histories(sol, thermo)
+    try:
+        for value in sweep_array:
+            config = dict(base_config)
+            config[parameter] = float(value)
 
-        q_max = np.max(q) / 1e6                # [MW/m²]
-        q_integral = np.trapezoid(q, t) / 1e6  # [MJ/m²]
+            key = config_hash(config)
+            if checkpoint is not None and key in checkpoint.completed:
+                _, q_max, q_integral, v_dot_max = checkpoint.completed[key]
+            else:
+                rocket = Vehicle(**config)
 
-        phys = thermo.phys
-        atmos = thermo.atmos
-        eom = EOM(rocket=rocket, atmos=atmos, phys=phys)
+                sol, thermo, rocket = run_simulation_from_rocket(rocket)
 
-        v_dot = np.empty_like(v)
-        for i, (ti, vi, gi, hi) in enumerate(zip(t, v, gamma, h)):
-            rhs = eom.right_sides(ti, np.array([vi, gi, hi]))
-            v_dot[i] = rhs[0]
+                q_max, q_integral, v_dot_max = compute_metrics(sol, thermo, rocket)
 
-        v_dot_max = np.max(np.abs(v_dot))
+                if checkpoint is not None:
+                    checkpoint.append(key, float(value), q_max, q_integral, v_dot_max)
 
-        q_max_list.append(q_max)
-        q_int_list.append(q_integral)
-        n_max_list.append(v_dot_max)
+            q_max_list.append(q_max)
+            q_int_list.append(q_integral)
+            n_max_list.append(v_dot_max)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
 
-    return (
+    result = (
         parameter,
         np.array(q_max_list, dtype=float),
         np.array(q_int_list, dtype=float),
         np.array(n_max_list, dtype=float),
-    )
\ No newline at end of file
+    )
+    return result + (None,) if return_report else result
+
+
+def adaptive_sweep_parameter(parameter: str, start: float, stop: float, base_input_file: str,
+                             n_initial: int = 21, rel_tol: float = 0.01, min_spacing: float | None = None,
+                             max_points: int = 400):
+    """
+    Adaptive version of sweep_parameter over [start, stop]. Starting from n_initial uniform points, an
+    interval is bisected while
+      - the outcome changes across it (ground impact vs. no impact within t_max, i.e. skip-out), or
+      - one of q_max, q_int, n_max deviates at a neighbouring point from the straight line through its
+        neighbours by more than rel_tol of that metric's range,
+    until no interval needs refinement, intervals are narrower than min_spacing (default: 1e-3 of the
+    range) or max_points points are used. Returns (parameter, x, q_max, q_int, n_max) with the
+    non-uniform, sorted grid x, ready for plot_sweep.
+    """
+    with open(base_input_file, "r", encoding="utf-8") as f:
+        base_config = json.load(f)
+
+    if parameter not in ("initial_angle", "ballistic_coefficient"):
+        raise ValueError("parameter must be 'initial_angle' or 'ballistic_coefficient'")
+
+    if min_spacing is None:
+        min_spacing = 1e-3 * (stop - start)
+
+    results = {}  # x -> (q_max, q_int, n_max, landed)
+
+    def evaluate(values):
+        for value in values:
+            config = dict(base_config)
+            config[parameter] = float(value)
+            rocket = Vehicle(**config)
+            sol, thermo, rocket = run_simulation_from_rocket(rocket)
+            results[float(value)] = (*compute_metrics(sol, thermo, rocket), sol.status == 1)
+
+    evaluate(np.linspace(start, stop, n_initial))
+
+    while len(results) < max_points:
+        x = np.array(sorted(results))
+        table = np.array([results[xi] for xi in x], dtype=float)
+        metrics, landed = table[:, :3], table[:, 3]
+
+        refine = landed[1:] != landed[:-1]  # per interval
+
+        # deviation of each interior point from the chord of its neighbours, scaled per metric
+        scale = np.ptp(metrics, axis=0)
+        scale[scale == 0.0] = 1.0
+        weight = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+        chord = metrics[:-2] + weight[:, None] * (metrics[2:] - metrics[:-2])
+        curved = np.any(np.abs(metrics[1:-1] - chord) / scale > rel_tol, axis=1)
+        refine[:-1] |= curved
+        refine[1:] |= curved
+
+        refine &= np.diff(x) > 2 * min_spacing
+        if not refine.any():
+            break
+
+        midpoints = 0.5 * (x[:-1] + x[1:])[refine]
+        evaluate(midpoints[:max_points - len(results)])
+
+    x = np.array(sorted(results))
+    table = np.array([results[xi][:3] for xi in x], dtype=float)
+    return parameter, x, table[:, 0], table[:, 1], table[:, 2]
+
+
+def monte_carlo_configs(base_input_file: str, dispersions: dict, n_samples: int, seed: int | None = None) -> list[dict]:
+    """
+    Draws n_samples vehicle configurations for a Monte Carlo dispersion study. dispersions maps a
+    Vehicle field to its standard deviation (same unit as in the input file); every sample is the base
+    configuration with normally distributed offsets on those fields.
+    """
+    with open(base_input_file, "r", encoding="utf-8") as f:
+        base_config = json.load(f)
+
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_samples):
+        config = dict(base_config)
+        for name, sigma in dispersions.items():
+            config[name] = float(base_config[name] + sigma * rng.standard_normal())
+        configs.append(config)
+
+    return configs
+
+
+def run_monte_carlo(base_input_file: str, dispersions: dict, n_samples: int, seed: int | None = None,
+                    precision: str = "float64", dt: float = 0.1, monitor_samples: int = 16,
+                    error_threshold: float = 1e-3):
+    """
+    Monte Carlo dispersion study (see monte_carlo_configs). Returns the sampled configurations, an
+    (n_samples, 3) array of q_max [MW/m²], q_int [MJ/m²] and n_max [m/s²] and the precision report
+    (None for float64). precision="float32" uses the reduced-precision screening mode with error
+    monitoring (see run_configs_reduced_precision for dt, monitor_samples and error_threshold).
+    """
+    configs = monte_carlo_configs(base_input_file, dispersions, n_samples, seed=seed)
+
+    if precision == "float32":
+        metrics, report = run_configs_reduced_precision(configs, dt=dt, monitor_samples=monitor_samples,
+                                                        error_threshold=error_threshold)
+    elif precision == "float64":
+        metrics = np.array([run_config(config) for config in configs], dtype=float).reshape(-1, 3)
+        report = None
+    else:
+        raise ValueError("precision must be 'float64' or 'float32'")
+
+    return configs, metrics, report
@@ -0,0 +1,228 @@
+import math
+import numpy as np
+from dataclasses import dataclass, replace
+from scipy.integrate import solve_ivp
+from scipy.optimize import minimize_scalar
+
+from vehicle import Vehicle
+from physics import Atmosphere, Physics
+from eom import EOM
+from thermo import Thermo
+
+# parameters the sensitivities are taken with respect to, in column order
+SENSITIVITY_PARAMETERS = ("initial_angle", "ballistic_coefficient", "L_over_D")  # [deg], [kg/m²], [-]
+
+
+@dataclass
+class SensitivityEOM:
+    """EOM augmented with the forward sensitivity matrix S = d(v, gamma, h)/d(parameters).
+
+    The augmented state is [v, gamma, h, S.ravel()] and S obeys dS/dt = J_x S + J_p with the analytic
+    Jacobians of the drag, lift and gravity terms of EOM.right_sides.
+    """
+    eom: EOM
+
+    def control_gain_derivative(self, gamma: float) -> float:
+        """d(control_gain)/d(gamma) (1/rad), zero outside the interpolation range"""
+        gamma_deg = math.degrees(gamma)
+        if self.eom.gamma_full_lift < gamma_deg < self.eom.gamma_no_lift:
+            return -math.degrees(1.0) / (self.eom.gamma_no_lift - self.eom.gamma_full_lift)
+        return 0.0
+
+    def jacobians(self, state: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """returns J_x = df/d(v, gamma, h) and J_p = df/d(SENSITIVITY_PARAMETERS), both 3x3"""
+        v, gamma, h = state[:3]
+        eom = self.eom
+
+        rho = eom.atmos.atmospheric_density(h)
+        drho_dh = eom.atmos.k * rho if h > 0.0 else 0.0
+        q = rho * v ** 2 / 2
+        g = eom.phys.gravitational_acceleration(h)
+        dg_dh = -2 * g / (eom.phys.RE + h) if h > 0.0 else 0.0
+        R = eom.phys.RE + h
+
+        beta = eom.rocket.get_ballistic_coefficient()
+        L_over_D = eom.rocket.get_L_over_D()
+        gain = eom.control_gain(gamma)
+        LoverD = gain * L_over_D
+        sin_g, cos_g = math.sin(gamma), math.cos(gamma)
+
+        # gamma_dot = A / v
+        A = - q / beta * LoverD + cos_g * (g - v ** 2 / R)
+
+        J_x = np.array([
+            [- rho * v / beta,
+             g * cos_g,
+             - drho_dh * v ** 2 / 2 / beta + dg_dh * sin_g],
+            [(- rho * v / beta * LoverD - 2 * v * cos_g / R) / v - A / v ** 2,
+             (- q / beta * self.control_gain_derivative(gamma) * L_over_D - sin_g * (g - v ** 2 / R)) / v,
+             (- drho_dh * v ** 2 / 2 / beta * LoverD + cos_g * (dg_dh + v ** 2 / R ** 2)) / v],
+            [- sin_g,
+             - v * cos_g,
+             0.0],
+        ])
+
+        J_p = np.array([
+            [0.0, q / beta ** 2, 0.0],
+            [0.0, q / beta ** 2 * LoverD / v, - q / beta * gain / v],
+            [0.0, 0.0, 0.0],
+        ])
+
+        return J_x, J_p
+
+    def right_sides(self, t: float, state: np.ndarray) -> np.ndarray:
+        S = state[3:].reshape(3, 3)
+        J_x, J_p = self.jacobians(state)
+        return np.concatenate([self.eom.right_sides(t, state[:3]), (J_x @ S + J_p).ravel()])
+
+
+def event_ground(t: float, state: np.ndarray):
+    return state[2]
+
+
+event_ground.terminal = True
+event_ground.direction = -1
+
+
+@dataclass
+class MetricGradients:
+    """Metrics of one trajectory and their derivatives with respect to SENSITIVITY_PARAMETERS"""
+    q_max: float             # [MW/m²]
+    q_int: float             # [MJ/m²]
+    n_max: float             # [m/s²]
+    d_q_max: np.ndarray      # (3,) [MW/m² per parameter unit]
+    d_q_int: np.ndarray      # (3,)
+    d_n_max: np.ndarray      # (3,)
+    d_t_final: np.ndarray    # (3,) [s per parameter unit], shift of the ground impact time
+
+
+def run_sensitivity_simulation(rocket: Vehicle,
+                               t_max: float = 10000.0,
+                               max_step: float = 0.5,
+                               rtol: float = 1e-8,
+                               atol: float = 1e-9,
+                               control_params: dict | None = None):
+    """Runs run_simulation_from_rocket's trajectory together with its sensitivity matrix in one solve.
+    Returns (solution, thermo, rocket, S) where S has shape (3, 3, len(solution.t)); solution.y holds the
+    augmented state, its first three rows are v, gamma and h as usual. solution.sol interpolates the
+    augmented state between the steps (used to locate the metric peaks)."""
+    atmos = Atmosphere()
+    phys = Physics(rocket=rocket)
+    thermo = Thermo(rocket=rocket, atmos=atmos, phys=phys)
+    eom = EOM(rocket=rocket, atmos=atmos, phys=phys, **(control_params or {}))
+
+    S0 = np.zeros((3, 3))
+    S0[1, 0] = math.radians(1.0)  # gamma0 = radians(initial_angle)
+    y0 = np.concatenate([[rocket.initial_velocity, math.radians(rocket.initial_angle), rocket.initial_altitude],
+                         S0.ravel()])
+
+    solution = solve_ivp(
+        fun=SensitivityEOM(eom).right_sides,
+        t_span=(0, t_max),
+        y0=y0,
+        events=event_ground,
+        max_step=max_step,
+        rtol=rtol,
+        atol=atol,
+        dense_output=True
+    )
+
+    S = solution.y[3:].reshape(3, 3, -1)
+    return solution, thermo, rocket, S
+
+
+def _locate_peak(sol, f, i: int) -> tuple[float, np.ndarray]:
+    """refines the sampled maximum f(state) at index i on the dense solution between the neighbouring
+    samples; returns the time of the peak and the augmented state there"""
+    t_lo, t_hi = sol.t[max(i - 1, 0)], sol.t[min(i + 1, sol.t.size - 1)]
+    peak = minimize_scalar(lambda t: -f(sol.sol(t)), bounds=(t_lo, t_hi), method="bounded",
+                           options={"xatol": 1e-9 * max(t_hi, 1.0)})
+    t_peak = peak.x if -peak.fun > f(sol.y[:, i]) else sol.t[i]
+    return t_peak, sol.sol(t_peak)
+
+
+def compute_metric_gradients(sol, thermo, rocket, S: np.ndarray, control_params: dict | None = None) -> MetricGradients:
+    """q_max, q_int and n_max as in running_utils.compute_metrics plus their exact derivatives from the
+    sensitivity histories. The peaks are located on the dense solution (where dq/dt = 0 and d|v_dot|/dt = 0)
+    and differentiated there via the envelope theorem; the heat load includes the shift of the impact time.
+    sol needs dense output, see run_sensitivity_simulation."""
+    eom = EOM(rocket=rocket, atmos=thermo.atmos, phys=thermo.phys, **(control_params or {}))
+    sens = SensitivityEOM(eom)
+    t = sol.t
+    v, gamma, h = sol.y[:3]
+
+    def heat_flux(x):
+        rho = thermo.atmos.rho0 * np.exp(thermo.atmos.k * np.maximum(x[2], 0.0))
+        return thermo.k_sg * np.sqrt(rho / rocket.nose_radius) * x[0] ** 3
+
+    def heat_flux_gradient(x):
+        """dq/d(parameters): dq/dv = 3 q / v, dq/dh = q k / 2"""
+        q_x = heat_flux(x)
+        return np.einsum("i...,ij...->j...", np.array([3 * q_x / x[0], np.zeros_like(q_x),
+                                                       q_x * thermo.atmos.k / 2 * (x[2] > 0)]),
+                         x[3:].reshape((3, 3) + np.shape(x)[1:]))
+
+    def deceleration(x):
+        return abs(eom.right_sides(0.0, x[:3])[0])
+
+    q = heat_flux(sol.y)
+    dq = heat_flux_gradient(sol.y)
+
+    # impact time: h(t_f(p), p) = 0  ->  dt_f/dp = -S_h / h_dot
+    h_dot_final = - v[-1] * math.sin(gamma[-1])
+    d_t_final = - S[2, :, -1] / h_dot_final
+
+    q_integral = np.trapezoid(q, t)
+    d_q_integral = np.trapezoid(dq, t, axis=1) + q[-1] * d_t_final
+
+    _, x_q = _locate_peak(sol, heat_flux, int(np.argmax(q)))
+
+    # deceleration: v_dot = f_1(x, p), d(v_dot)/dp = J_x[0] S + J_p[0]
+    i_n = int(np.argmax([deceleration(sol.y[:, i]) for i in range(t.size)]))
+    _, x_n = _locate_peak(sol, deceleration, i_n)
+    v_dot = eom.right_sides(0.0, x_n[:3])[0]
+    J_x, J_p = sens.jacobians(x_n)
+    d_v_dot = J_x[0] @ x_n[3:].reshape(3, 3) + J_p[0]
+
+    return MetricGradients(
+        q_max=heat_flux(x_q) / 1e6,
+        q_int=q_integral / 1e6,
+        n_max=abs(v_dot),
+        d_q_max=heat_flux_gradient(x_q) / 1e6,
+        d_q_int=d_q_integral / 1e6,
+        d_n_max=np.sign(v_dot) * d_v_dot,
+        d_t_final=d_t_final,
+    )
+
+
+def finite_difference_gradients(rocket: Vehicle, control_params: dict | None = None,
+                                rel_step: float = 1e-4, **solver_kwargs) -> np.ndarray:
+    """central finite differences of (q_max, q_int, n_max) w.r.t. SENSITIVITY_PARAMETERS as a (3, 3) array
+    (rows: metrics), for checking compute_metric_gradients; every evaluation is a full solve"""
+    def metrics(r: Vehicle) -> np.ndarray:
+        g = compute_metric_gradients(*run_sensitivity_simulation(r, control_params=control_params, **solver_kwargs),
+                                     control_params)
+        return np.array([g.q_max, g.q_int, g.n_max])
+
+    gradients = np.empty((3, 3))
+    for j, name in enumerate(SENSITIVITY_PARAMETERS):
+        step = rel_step * max(abs(getattr(rocket, name)), 1.0)
+        up = metrics(replace(rocket, **{name: getattr(rocket, name) + step}))
+        down = metrics(replace(rocket, **{name: getattr(rocket, name) - step}))
+        gradients[:, j] = (up - down) / (2 * step)
+    return gradients
+
+
+if __name__ == "__main__":
+    # compares the sensitivity gradients with finite differences for the example vehicles
+    for input_file in ("inputs/input_ballisticCapsule.json", "inputs/input_liftingBody.json"):
+        vehicle = Vehicle.import_data(input_file)
+        g = compute_metric_gradients(*run_sensitivity_simulation(vehicle))
+        analytic = np.array([g.d_q_max, g.d_q_int, g.d_n_max])
+        fd = finite_difference_gradients(vehicle)
+        print(input_file)
+        for name, a_row, fd_row in zip(("q_max", "q_int", "n_max"), analytic, fd):
+            print(f"  d_{name}: sensitivity {np.array2string(a_row, precision=5)}"
+                  f"  finite differences {np.array2string(fd_row, precision=5)}")
+        error = np.max(np.abs(analytic - fd) / np.maximum(np.abs(fd), 1e-12 * np.max(np.abs(fd))))
+        print(f"  max relative deviation {error:.2e}")
@@ -0,0 +1,236 @@
+import json
+import time
+import asyncio
+from functools import partial
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from vehicle import Vehicle
+from batch import BatchEOM
+from running_utils import config_hash, run_config
+
+
+def parse_config(config: dict) -> tuple[Vehicle, dict]:
+    """splits a request configuration (vehicle fields plus optional 'control_params') into the vehicle and
+    its control parameters; raises TypeError / ValueError for unknown or missing fields, non-numeric or
+    non-finite values and an invalid control law"""
+    config = dict(config)
+    control_params = config.pop("control_params", None) or {}
+    rocket = Vehicle(**config)
+    unknown = set(control_params) - {"gamma_full_lift", "gamma_no_lift"}
+    if unknown:
+        raise TypeError(f"unknown control parameters {sorted(unknown)}")
+
+    values = np.array([getattr(rocket, f.name) for f in fields(Vehicle)] + list(control_params.values()), dtype=float)
+    if not np.all(np.isfinite(values)):
+        raise ValueError("configuration values must be finite numbers")
+    BatchEOM.from_rockets([rocket], control_params)  # checks the control law
+    return rocket, control_params
+
+
+class ServiceBusy(Exception):
+    """raised when the request queue is full"""
+
+
+@dataclass
+class _Request:
+    config: dict
+    key: str
+    future: asyncio.Future
+
+
+@dataclass
+class SimulationService:
+    """Asyncio front end for the simulator that coalesces concurrent requests.
+
+    The first request of a batch opens a window of batch_window seconds; everything arriving in that window
+    (up to max_batch_size) is deduplicated by config hash, and requests for a configuration that is already
+    being simulated wait for that run. Every distinct configuration is solved on its own in the executor
+    (run_config, the same float64 path as the sweeps), so answers do not depend on which other requests
+    shared the window and a slow member (e.g. a skip-out trajectory running to t_max) only delays its own
+    callers. At most max_batch_size configurations are simulated at a time. Finished results are cached,
+    so repeated what-if queries return immediately. At most max_queue requests may wait; further ones are
+    rejected with ServiceBusy instead of growing the tail latency. Invalid configurations are rejected
+    before they are queued.
+    """
+    batch_window: float = 0.01     # [s]
+    max_batch_size: int = 64
+    max_queue: int = 1024
+    cache_size: int = 10000
+    executor: Executor | None = None
+
+    def __post_init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._cache: dict[str, tuple[float, float, float]] = {}
+        self._running: dict[str, list[_Request]] = {}  # config hash -> requests waiting for that run
+        self._slots: asyncio.Semaphore | None = None
+        self._latencies = deque(maxlen=10000)  # [s] per request, most recent ones
+        self._batch_sizes = deque(maxlen=1000)
+        self.n_requests = 0
+        self.n_rejected = 0
+        self.n_cache_hits = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.max_batch_size)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor()
+        self._worker = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def simulate(self, config: dict) -> tuple[float, float, float]:
+        """metrics of one vehicle configuration; raises ServiceBusy when the queue is full and TypeError /
+        ValueError for an invalid configuration (see parse_config)"""
+        self.n_requests += 1
+        start = time.perf_counter()
+        key = config_hash(config)
+        parse_config(config)
+
+        if key in self._cache:
+            self.n_cache_hits += 1
+            self._latencies.append(time.perf_counter() - start)
+            return self._cache[key]
+
+        request = _Request(config=config, key=key, future=asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self.n_rejected += 1
+            raise ServiceBusy(f"more than {self.max_queue} requests waiting")
+
+        result = await request.future
+        self._latencies.append(time.perf_counter() - start)
+        return result
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            unique = {}
+            for request in batch:
+                unique.setdefault(request.key, []).append(request)
+            self._batch_sizes.append(len(unique))
+
+            for key, requests in unique.items():
+                if key in self._running:
+                    self._running[key].extend(requests)
+                    continue
+                await self._slots.acquire()
+                self._running[key] = requests
+                future = loop.run_in_executor(self.executor, run_config, requests[0].config)
+                future.add_done_callback(partial(self._finish, key))
+
+    def _finish(self, key: str, future: asyncio.Future):
+        """hands the result (or error) of one configuration to all requests waiting for it"""
+        self._slots.release()
+        requests = self._running.pop(key)
+        if future.cancelled():
+            for request in requests:
+                request.future.cancel()
+            return
+
+        error = future.exception()
+        if error is None:
+            result = tuple(map(float, future.result()))
+            if len(self._cache) >= self.cache_size:
+                self._cache.pop(next(iter(self._cache)))  # drop the oldest entry
+            self._cache[key] = result
+
+        for request in requests:
+            if request.future.done():
+                continue
+            if error is None:
+                request.future.set_result(result)
+            else:
+                request.future.set_exception(error)
+
+    def metrics(self) -> dict:
+        """request counters and latency percentiles (ms) over the most recent requests"""
+        latencies = np.array(self._latencies) * 1e3
+        percentiles = np.percentile(latencies, [50, 95, 99]).tolist() if latencies.size else [None] * 3  # JSON null
+        return {
+            "requests": self.n_requests,
+            "rejected": self.n_rejected,
+            "cache_hits": self.n_cache_hits,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "mean_batch_size": float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            "latency_p50_ms": percentiles[0],
+            "latency_p95_ms": percentiles[1],
+            "latency_p99_ms": percentiles[2],
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """line protocol, one JSON object per line:
+        {"id": ..., "config": {...}} -> {"id": ..., "q_max": ..., "q_int": ..., "n_max": ...} or {"id", "error"}
+        {"id": ..., "metrics": true} -> {"id": ..., "metrics": {...}}
+        Requests on one connection are handled concurrently, answers may come back out of order."""
+        lock = asyncio.Lock()
+
+        async def answer(message: dict):
+            response = {"id": message.get("id")}
+            try:
+                if message.get("metrics"):
+                    response["metrics"] = self.metrics()
+                else:
+                    response.update(zip(("q_max", "q_int", "n_max"), await self.simulate(message["config"])))
+            except Exception as error:
+                response["error"] = repr(error)
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode("utf-8"))
+                await writer.drain()
+
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError as error:
+                    writer.write((json.dumps({"id": None, "error": repr(error)}) + "\n").encode("utf-8"))
+                    continue
+                task = asyncio.create_task(answer(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, unix_path: str | None = None, **service_kwargs):
+    """runs the service on a TCP port or, if unix_path is given, on a Unix socket until cancelled"""
+    service = SimulationService(**service_kwargs)
+    await service.start()
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(service.handle_connection, path=unix_path)
+    else:
+        server = await asyncio.start_server(service.handle_connection, host=host, port=port)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
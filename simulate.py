@@ -18,13 +18,15 @@ def run_simulation_from_rocket(rocket: Vehicle,
                                t_max: float = 10000.0,
                                max_step: float = 0.5,
                                rtol: float = 1e-8,
-                               atol: float = 1e-9):
-    """Runs the atmospheric entry simulation using solve_ivp and returns the solution object"""
+                               atol: float = 1e-9,
+                               control_params: dict | None = None):
+    """Runs the atmospheric entry simulation using solve_ivp and returns the solution object.
+    control_params optionally overrides the EOM control law (gamma_full_lift, gamma_no_lift in deg)."""
 
     atmos = Atmosphere()
     phys = Physics(rocket=rocket)
     thermo = Thermo(rocket=rocket, atmos=atmos, phys=phys)
-    eom = EOM(rocket=rocket, atmos=atmos, phys=phys)
+    eom = EOM(rocket=rocket, atmos=atmos, phys=phys, **(control_params or {}))
 
     v0 = rocket.initial_velocity
     gamma0 = math.radians(rocket.initial_angle)
@@ -0,0 +1,158 @@
+import json
+import numpy as np
+from dataclasses import dataclass, field
+from scipy.interpolate import RBFInterpolator
+from scipy.stats import qmc
+
+from vehicle import Vehicle
+from simulate import run_simulation_from_rocket
+from running_utils import compute_metrics
+
+SURROGATE_PARAMETERS = ("initial_angle", "ballistic_coefficient", "L_over_D", "initial_velocity")
+METRICS = ("q_max", "q_int", "n_max")  # [MW/m²], [MJ/m²], [m/s²]
+
+
+def simulate_points(base_config: dict, names: tuple[str, ...], points: np.ndarray) -> np.ndarray:
+    """runs one trajectory per row of points (columns ordered like names) and returns an (n, 3) array of
+    q_max, q_int and n_max, like sweep_parameter does for a single parameter"""
+    metrics = np.empty((len(points), len(METRICS)))
+    for i, x in enumerate(points):
+        config = dict(base_config)
+        config.update({name: float(value) for name, value in zip(names, x)})
+
+        rocket = Vehicle(**config)
+        sol, thermo, rocket = run_simulation_from_rocket(rocket)
+        metrics[i] = compute_metrics(sol, thermo, rocket)
+
+    return metrics
+
+
+@dataclass
+class MetricSurrogate:
+    """Radial basis function surrogate for q_max, q_int and n_max.
+
+    Inputs are scaled to the unit box and the metrics are fitted in log space, so the error estimate is a
+    relative one. The error estimate is the spread of k models that each leave out one fold of the
+    training data; it is cheap to evaluate and largest where the training data is sparse or the metrics
+    change quickly, which is where refine() adds new simulations.
+    """
+    base_config: dict
+    bounds: dict                       # parameter name -> (lower, upper)
+    kernel: str = "thin_plate_spline"
+    smoothing: float = 0.0
+    n_folds: int = 5
+
+    X: np.ndarray = field(default=None, init=False)  # (n, d) training inputs
+    Y: np.ndarray = field(default=None, init=False)  # (n, 3) training metrics
+
+    def __post_init__(self):
+        for name in self.bounds:
+            if name not in SURROGATE_PARAMETERS:
+                raise ValueError(f"unsupported surrogate parameter '{name}', choose from {SURROGATE_PARAMETERS}")
+        self.names = tuple(self.bounds)
+        self.lower = np.array([self.bounds[n][0] for n in self.names], dtype=float)
+        self.upper = np.array([self.bounds[n][1] for n in self.names], dtype=float)
+        self._model = None
+        self._fold_models = []
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=float) - self.lower) / (self.upper - self.lower)
+
+    def _fit(self):
+        U = self._scale(self.X)
+        log_Y = np.log(self.Y)
+        self._model = RBFInterpolator(U, log_Y, kernel=self.kernel, smoothing=self.smoothing)
+
+        folds = np.arange(len(U)) % self.n_folds
+        self._fold_models = [
+            RBFInterpolator(U[folds != k], log_Y[folds != k], kernel=self.kernel, smoothing=self.smoothing)
+            for k in range(self.n_folds)
+        ]
+
+    def add_points(self, X: np.ndarray, Y: np.ndarray | None = None):
+        """adds training points (simulating them if Y is not given) and refits"""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if Y is None:
+            Y = simulate_points(self.base_config, self.names, X)
+
+        self.X = X if self.X is None else np.vstack([self.X, X])
+        self.Y = Y if self.Y is None else np.vstack([self.Y, Y])
+        self._fit()
+
+    def train(self, n_samples: int, seed: int | None = None):
+        """trains on a Latin hypercube design over the bounds"""
+        sampler = qmc.LatinHypercube(d=len(self.names), seed=seed)
+        self.add_points(qmc.scale(sampler.random(n_samples), self.lower, self.upper))
+
+    def predict(self, X: np.ndarray, return_error: bool = False):
+        """predicts the metrics for an (m, d) array of query points, vectorized over all points.
+        Returns an (m, 3) array; with return_error also the estimated relative error per metric."""
+        U = self._scale(np.atleast_2d(X))
+        prediction = np.exp(self._model(U))
+
+        if not return_error:
+            return prediction
+
+        fold_predictions = np.stack([model(U) for model in self._fold_models])
+        return prediction, np.std(fold_predictions, axis=0)
+
+    def cross_validation_error(self) -> np.ndarray:
+        """k-fold cross validation RMS relative error per metric"""
+        U = self._scale(self.X)
+        folds = np.arange(len(U)) % self.n_folds
+        log_Y = np.log(self.Y)
+
+        residuals = np.empty_like(log_Y)
+        for k, model in enumerate(self._fold_models):
+            residuals[folds == k] = model(U[folds == k]) - log_Y[folds == k]
+
+        return np.sqrt(np.mean(np.expm1(residuals) ** 2, axis=0))
+
+    def refine(self,
+               tol: float = 0.01,
+               n_candidates: int = 2000,
+               batch_size: int = 8,
+               max_points: int = 500,
+               seed: int | None = None) -> int:
+        """adaptive refinement: simulates new points only where the estimated relative error of any metric
+        exceeds tol, picking the worst candidates first. Returns the number of points added."""
+        rng = np.random.default_rng(seed)
+        n_added = 0
+
+        while len(self.X) < max_points:
+            candidates = self.lower + rng.random((n_candidates, len(self.names))) * (self.upper - self.lower)
+            _, error = self.predict(candidates, return_error=True)
+            worst = np.max(error, axis=1)
+
+            order = np.argsort(worst)[::-1][:min(batch_size, max_points - len(self.X))]
+            order = order[worst[order] > tol]
+            if len(order) == 0:
+                break
+
+            self.add_points(candidates[order])
+            n_added += len(order)
+
+        return n_added
+
+    def save(self, file_path: str):
+        """stores the training data and settings in a .npz file; the model is refitted on load"""
+        np.savez(
+            file_path,
+            X=self.X,
+            Y=self.Y,
+            settings=json.dumps({
+                "base_config": self.base_config,
+                "bounds": self.bounds,
+                "kernel": self.kernel,
+                "smoothing": self.smoothing,
+                "n_folds": self.n_folds,
+            }),
+        )
+
+    @classmethod
+    def load(cls, file_path: str) -> "MetricSurrogate":
+        with np.load(file_path) as data:
+            settings = json.loads(str(data["settings"]))
+            surrogate = cls(**settings)
+            surrogate.add_points(data["X"], data["Y"])
+        return surrogate
@@ -1,9 +1,22 @@
+import shutil
+import subprocess
 import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from pathlib import Path
 
 from physics import Physics
 
-def plot_movement(sol):
+# upper half of the Earth's outline (km), computed once instead of on every plot
+_PHI = np.linspace(0, np.pi, 500)  # 0 bis 180° = top half of Earth
+EARTH_X_KM = Physics.RE * np.cos(_PHI) / 1000
+EARTH_Y_KM = Physics.RE * np.sin(_PHI) / 1000
+
+
+def trajectory_xy(sol) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """returns time (s) and the Cartesian trajectory (m) relative to the Earth's center"""
     t = sol.t
     v = sol.y[0]
     gamma = sol.y[1]
@@ -12,28 +25,29 @@ def plot_movement(sol):
     RE = Physics.RE
     r = RE + h
 
-    theta = np.zeros_like(t)        # initialise array for angle
+    theta_dot = - v * np.cos(gamma) / r
+
+    theta = np.empty_like(t)        # initialise array for angle
     theta[0] = np.pi / 2            # start at 90° (zenith)
+    theta[1:] = theta[0] + np.cumsum(0.5 * (theta_dot[1:] + theta_dot[:-1]) * np.diff(t))  # trapezoidal rule
 
-    for i in range(1, len(t)):
-        dt = t[i] - t[i - 1]
+    x_traj = r * np.cos(theta)       # convert to Cartesian coordinates
+    y_traj = r * np.sin(theta)
 
-        theta_dot_i = - v[i] * np.cos(gamma[i]) / r[i]
-        theta_dot_im1 = - v[i - 1] * np.cos(gamma[i - 1]) / r[i - 1]
+    return t, x_traj, y_traj
 
-        theta[i] = theta[i - 1] + 0.5 * (theta_dot_i + theta_dot_im1) * dt
 
-    x_traj = r * np.cos(theta)       # convert to Cartesian coordinates
-    y_traj = r * np.sin(theta)
+def _draw_earth(ax):
+    ax.fill(EARTH_X_KM, EARTH_Y_KM, alpha=0.2)
+    ax.plot(EARTH_X_KM, EARTH_Y_KM, linewidth=2, label="Earth")
 
-    phi = np.linspace(0, np.pi, 500)  # 0 bis 180° = top half of Earth
-    x_earth = RE * np.cos(phi)
-    y_earth = RE * np.sin(phi)
+
+def plot_movement(sol):
+    _, x_traj, y_traj = trajectory_xy(sol)
 
     plt.figure(figsize=(8, 8))
 
-    plt.fill(x_earth / 1000, y_earth / 1000, alpha=0.2)  # km
-    plt.plot(x_earth / 1000, y_earth / 1000, linewidth=2, label="Earth")
+    _draw_earth(plt.gca())
 
     plt.plot(x_traj / 1000, y_traj / 1000, label="Reentry trajectory")
 
@@ -46,4 +60,103 @@ def plot_movement(sol):
     plt.xlim(-50, 450)
     plt.ylim(6300, 6500)
 
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+class _FrameSink:
+    """Streams raw RGBA frames to ffmpeg's stdin, so no frame is kept after it was written (ffmpeg writes
+    MP4 or GIF by suffix). There is no fallback without ffmpeg, since every Python GIF writer collects all
+    frames in memory first."""
+
+    def __init__(self, file_path: Path, width: int, height: int, fps: int):
+        self.file_path = file_path
+
+        ffmpeg = shutil.which(rcParams["animation.ffmpeg_path"])
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg is required for the animation export, install it or set "
+                               "rcParams['animation.ffmpeg_path']")
+
+        codec = [] if file_path.suffix == ".gif" else [
+            "-vcodec", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]  # even size
+        self.process = subprocess.Popen(
+            [ffmpeg, "-y", "-loglevel", "error",
+             "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+             *codec, str(file_path)],
+            stdin=subprocess.PIPE,
+        )
+
+    def write(self, rgba: memoryview):
+        self.process.stdin.write(rgba)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to write {self.file_path}")
+
+
+def animate_movement(solutions: list, labels: list[str] | None = None, file_path: str = "plots/reentry.mp4",
+                     fps: int = 30, duration: float = 10.0, dpi: int = 100,
+                     xlim=(-50, 450), ylim=(6300, 6500)) -> Path:
+    """
+    Exports an animation of one or more reentry trajectories over the Earth as MP4 or GIF (by suffix);
+    needs ffmpeg, which encodes the frames as they are streamed to it.
+
+    Frames are spaced uniformly in simulated time (resampled from the solution histories), all vehicles
+    share one clock. The Earth, grid and labels are rendered once into a cached background; each frame only
+    restores that background and redraws the moving trails and markers (blitting) before its pixels are
+    streamed to the encoder.
+    """
+    labels = labels or [f"vehicle {i + 1}" for i in range(len(solutions))]
+    tracks = [(t, x / 1000, y / 1000) for t, x, y in map(trajectory_xy, solutions)]  # km
+    t_end = max(t[-1] for t, _, _ in tracks)
+    frame_times = np.linspace(0.0, t_end, max(int(fps * duration), 2))
+
+    fig = Figure(figsize=(8, 8), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    _draw_earth(ax)
+    trails, markers = [], []
+    for label in labels:
+        trail, = ax.plot([], [], label=label, animated=True)
+        marker, = ax.plot([], [], "o", color=trail.get_color(), animated=True)
+        trails.append(trail)
+        markers.append(marker)
+    time_text = ax.text(0.02, 0.95, "", transform=ax.transAxes, animated=True)
+
+    ax.set_aspect("equal", "box")
+    ax.set_xlabel("x (km)")
+    ax.set_ylabel("y (km)")
+    ax.set_title("Reentry trajectory relative to Earth")
+    ax.legend(loc="upper right")
+    ax.grid(True)
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    sink = _FrameSink(file_path, *canvas.get_width_height(), fps)
+    try:
+        for t_frame in frame_times:
+            canvas.restore_region(background)
+
+            for (t, x, y), trail, marker in zip(tracks, trails, markers):
+                n = np.searchsorted(t, t_frame, side="right")
+                x_now = np.interp(t_frame, t, x)
+                y_now = np.interp(t_frame, t, y)
+                trail.set_data(np.append(x[:n], x_now), np.append(y[:n], y_now))
+                marker.set_data([x_now], [y_now])
+                ax.draw_artist(trail)
+                ax.draw_artist(marker)
+
+            time_text.set_text(f"t = {t_frame:.0f} s")
+            ax.draw_artist(time_text)
+
+            sink.write(canvas.buffer_rgba())
+    finally:
+        sink.close()
+
+    return file_path